@@ -1,16 +1,23 @@
 import pandas as pd
 from sklearn.pipeline import Pipeline
 from src.data_processing import ScaleData, EncodelData, Imputer
+from src.data_validation import DataValidator, DEFAULT_RULES
+from src.processing_cache import ProcessingCache
+from src.anomaly_detection import PriceAnomalyDetector
+from src.feature_store import PriceFeatureStore
 from sklearn.preprocessing import OneHotEncoder, StandardScaler, MinMaxScaler
 import os
 import json
+import logging
+import time
 from typing import Union
 from src.s3_operations import S3BucketHandler
 configs = json.load(open("config.json"))
+processing_configs = json.load(open("src/processing_config.json"))
 
 
 
-def processData(df:pd.DataFrame, num_impute_method:str='mean', scale_method:str='minmax', encoder_method:str='label', scaler:Union[None, StandardScaler, MinMaxScaler]=None, encoder:Union[None, dict, OneHotEncoder]=None) -> pd.DataFrame:
+def processData(df:pd.DataFrame, num_impute_method:str='mean', scale_method:str='minmax', encoder_method:str='label', scaler:Union[None, StandardScaler, MinMaxScaler]=None, encoder:Union[None, dict, OneHotEncoder]=None, category_codes:Union[None, dict]=None) -> pd.DataFrame:
     """
     Args:
         df: unprocessed data
@@ -22,6 +29,8 @@ def processData(df:pd.DataFrame, num_impute_method:str='mean', scale_method:str=
         encoder: Pass None if you want to create new encoder while processing data 
                 for 'label' method pass dictionary of column as key and respective fitted label encoder,
                 for 'onehot' method pass fitted OneHotEncoder
+        category_codes: DataValidator.category_codes of df from a validator built on the same label encoders,
+                the label codes are reused instead of looking every value up again
 
     Description: This function will apply encoding techniques for categorical data and scaling techniques for numerical data
 
@@ -35,7 +44,7 @@ def processData(df:pd.DataFrame, num_impute_method:str='mean', scale_method:str=
     pipeline_steps = [
         ("imputer", Imputer(cat_cols=cat_cols, num_cols=num_cols, num_method=num_impute_method)),
         ("scaler", ScaleData(num_cols=num_cols, method=scale_method, scaler=scaler)),
-        ("encoder", EncodelData(cat_cols=cat_cols, method=encoder_method, encoder=encoder))
+        ("encoder", EncodelData(cat_cols=cat_cols, method=encoder_method, encoder=encoder, codes=category_codes))
         ]
 
     processing_pipeline = Pipeline(
@@ -47,6 +56,63 @@ def processData(df:pd.DataFrame, num_impute_method:str='mean', scale_method:str=
 
 
 
+def cachedProcessData(df:pd.DataFrame, cache:ProcessingCache, num_impute_method:str='mean', scale_method:str='minmax', encoder_method:str='label', scaler:Union[None, StandardScaler, MinMaxScaler]=None, encoder:Union[None, dict, OneHotEncoder]=None, category_codes:Union[None, dict]=None) -> tuple:
+    """
+    Args:
+        df: unprocessed data
+        cache: ProcessingCache holding previously processed batches
+        remaining arguments are passed to processData, category_codes derive from df and encoder so they are not part of the key
+
+    Description: Serves the batch from cache when its contents, the fitted artifacts and the processing methods
+                 are unchanged, otherwise runs processData and stores the result.
+
+    Returns:
+        (df, hit, key): processed data, whether it came from cache and the cache key
+    """
+
+    key = cache.makeKey(
+        df,
+        artifact_version=cache.artifactVersion(scaler, encoder),
+        num_impute_method=num_impute_method,
+        scale_method=scale_method,
+        encoder_method=encoder_method
+    )
+    processed_data = cache.get(key)
+    if processed_data is not None:
+        return processed_data, True, key
+
+    start = time.perf_counter()
+    processed_data = processData(df=df, num_impute_method=num_impute_method, scale_method=scale_method, encoder_method=encoder_method, scaler=scaler, encoder=encoder, category_codes=category_codes)
+    cache.put(key, processed_data, compute_seconds=time.perf_counter() - start)
+    return processed_data, False, key
+
+
+
+def appendBatchOnce(s3_handler:S3BucketHandler, cache:ProcessingCache, batch_key:str, file_key:str, df:pd.DataFrame) -> bool:
+    """
+    Args:
+        s3_handler: S3BucketHandler owning the bucket
+        cache: ProcessingCache recording the uploads
+        batch_key: key identifying what df was derived from, the raw batch or its processing cache key
+        file_key: path of the file inside the bucket
+        df: rows to append
+
+    Description: Appends df unless an earlier run already appended this batch to file_key.
+                 The upload is recorded only after the append succeeded.
+
+    Returns:
+        bool: whether df was appended
+    """
+
+    if cache.isUploaded(batch_key, file_key):
+        logging.info("Batch %s already appended to %s, skipping.", batch_key, file_key)
+        return False
+    s3_handler.appendToS3StreamCSV(file_key=file_key, new_data_df=df)
+    cache.markUploaded(batch_key, file_key)
+    return True
+
+
+
 def runProcessingPipeline(num_impute_method:str='mean', scale_method:str='minmax', encoder_method:str='label', scaler=Union[None, StandardScaler, MinMaxScaler], encoder:Union[None, dict, OneHotEncoder]=None) -> None:
     """
     Args:
@@ -75,9 +141,39 @@ def runProcessingPipeline(num_impute_method:str='mean', scale_method:str='minmax
     # processed_data = processData(df=data, num_impute_method="mean", scale_method="minmax", encoder_method="label")
     # s3_handler.appendToS3StreamCSV(file_key=configs["processed_file_key"], new_data_df=processed_data)
 
+    validator = DataValidator.fromEncoder(encoder=encoder)
+    # Alerting and the feature store need prices as they arrive, so they only drop rows with bad prices, dates or duplicates
+    # and keeps rows the encoders have not seen yet (e.g. new arrival dates).
+    price_validator = DataValidator(rules=[rule for rule in DEFAULT_RULES if rule["kind"] != "known_category"])
+    cache = ProcessingCache(
+        cache_folder=processing_configs["processing_cache_folder_path"],
+        max_size_bytes=processing_configs["processing_cache_max_bytes"]
+    )
+    detector = PriceAnomalyDetector.loadOrCreate(processing_configs["anomaly_state_file_path"])
+    feature_store = PriceFeatureStore.restoreOrCreate(processing_configs["feature_store_folder_path"], window=processing_configs["feature_store_window"])
+
     for data in s3_handler.readS3DataStreaming(file_key=configs["all_row_data_key"], nrows=100, totalrows=10000):
-        processed_data = processData(df=data, num_impute_method="mean", scale_method="minmax", encoder_method="label", scaler=scaler, encoder=encoder)
-        s3_handler.appendToS3StreamCSV(file_key=configs["batch_processed_file_key"], new_data_df=processed_data)
+        # Rows derived from the raw batch alone are uploaded once per batch, processed rows once per processing key,
+        # so re-running over the same stream appends nothing twice but a refit or new method uploads the new output.
+        batch_key = cache.makeKey(data, artifact_version="")
+        price_data, _ = price_validator.validate(data)
+        data, quarantined_data = validator.validate(data)
+        if not quarantined_data.empty:
+            appendBatchOnce(s3_handler, cache, batch_key, configs["quarantine_file_key"], quarantined_data)
+        feature_store.append(price_data, batch_key=batch_key)
+        anomalies = detector.update(price_data, batch_key=batch_key)
+        if not anomalies.empty:
+            appendBatchOnce(s3_handler, cache, batch_key, configs["anomaly_file_key"], anomalies)
+        if data.empty:
+            logging.warning("Every row of batch %s was quarantined, skipping processing.", batch_key)
+            continue
+        processed_data, _, processing_key = cachedProcessData(df=data, cache=cache, num_impute_method=num_impute_method, scale_method=scale_method, encoder_method=encoder_method, scaler=scaler, encoder=encoder, category_codes=validator.category_codes)
+        appendBatchOnce(s3_handler, cache, processing_key, configs["batch_processed_file_key"], processed_data)
+
+    detector.save(processing_configs["anomaly_state_file_path"])
+    feature_store.snapshot(processing_configs["feature_store_folder_path"])
+    logging.info("Validation violation counts: %s", validator.violation_counts)
+    logging.info("Processing cache report: %s", cache.report())
 
     # df = s3_handler.readS3Data(file_key=configs["processed_file_key"], nrows=-1)
     # df.to_csv("processed_data_all_rows.csv", index=False)
@@ -0,0 +1,257 @@
+import duckdb
+import glob
+import os
+import time
+import pandas as pd
+from collections import OrderedDict, deque
+from typing import Union
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', filemode='a', filename='logs.log')
+
+
+
+class PriceAnalytics:
+    """
+    This class is responsible for ad-hoc SQL analytics over the price tables.
+    - Table files (BuildTable outputs, S3 objects) are registered as DuckDB views, so filters and
+      projections are pushed down to the file scans instead of loading whole DataFrames
+    - Query results are cached until their TTL expires or a new ingest changes the registered files,
+      at most max_entries of them, evicting the least recently used
+    - The wall time of the last max_timings queries is recorded in `timings`
+    """
+
+    def __init__(self, database: str = ":memory:", ttl_seconds: float = 300, max_entries: int = 128, max_timings: int = 1000):
+        """
+        Args:
+            database: DuckDB database file, or ":memory:"
+            ttl_seconds: how long a cached result is served
+            max_entries: number of cached results kept
+            max_timings: number of query timings kept
+        """
+        logging.info("Initializing PriceAnalytics on %s with ttl %s seconds", database, ttl_seconds)
+        self.connection = duckdb.connect(database)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.local_sources = {}
+        self.view_files = {}
+        self.generation = 0
+        self.cache = OrderedDict()
+        self.timings = deque(maxlen=max_timings)
+
+
+
+    @staticmethod
+    def __scan(path: str) -> str:
+        path = path.replace("'", "''")
+        if path.endswith(".parquet"):
+            return f"read_parquet('{path}', union_by_name=true)"
+        return f"read_csv_auto('{path}', union_by_name=true)"
+
+
+
+    @staticmethod
+    def __checkViewName(view_name: str) -> str:
+        # View names are interpolated into SQL, so only plain identifiers are accepted.
+        if not view_name.isidentifier():
+            logging.error("Invalid view name: %s", view_name)
+            raise ValueError(f"Invalid view name {view_name}")
+        return view_name
+
+
+
+    def __createView(self, view_name: str, path: str) -> None:
+        self.__checkViewName(view_name)
+        self.connection.execute(f"CREATE OR REPLACE VIEW {view_name} AS SELECT * FROM {self.__scan(path)}")
+        self.invalidate()
+        logging.info("Registered view %s over %s", view_name, path)
+
+
+
+    def registerFolder(self, view_name: str, folder_path: str, pattern: str = "*.csv", latest_only: bool = False) -> None:
+        """
+        Args:
+            view_name: name to query the table by
+            folder_path: folder holding the table files
+            pattern: glob of the files inside folder_path (.csv or .parquet)
+            latest_only: query only the last matching file by name instead of all of them,
+                         for folders of full snapshots with sortable (e.g. timestamped) names
+        """
+        path = os.path.join(folder_path, pattern)
+        self.local_sources[view_name] = (path, latest_only)
+        if latest_only:
+            files = sorted(glob.glob(path))
+            if not files:
+                logging.error("No file matches %s", path)
+                raise FileNotFoundError(f"No file matches {path}")
+            path = files[-1]
+        self.view_files[view_name] = path
+        self.__createView(view_name, path)
+
+
+
+    def registerBuildTable(self, builder, view_name: str = "market_prices") -> None:
+        """
+        Args:
+            builder: BuildTable whose saveData outputs should be queried
+            view_name: name to query the table by
+
+        Description: Every getData run saves a full merged snapshot, so consecutive snapshots overlap and
+                     only the latest one is queried. The view moves to a newer snapshot once it is written.
+        """
+        self.registerFolder(view_name, builder.save_folder_path, pattern="market_prices_*.csv", latest_only=True)
+
+
+
+    def registerS3(self, handler, file_key: str, view_name: str) -> None:
+        """
+        Args:
+            handler: S3BucketHandler owning the bucket
+            file_key: path of the file inside the bucket
+            view_name: name to query the table by
+
+        Description: Reads the object directly over httpfs with the default AWS credential chain.
+                     S3 objects have no cheap change signal, so results over them rely on the TTL
+                     or an explicit invalidate() after appending.
+        """
+        self.connection.execute("INSTALL httpfs")
+        self.connection.execute("LOAD httpfs")
+        self.connection.execute("CREATE SECRET IF NOT EXISTS (TYPE s3, PROVIDER credential_chain)")
+        self.__createView(view_name, f"s3://{handler.bucket_name}/{file_key}")
+
+
+
+    def invalidate(self) -> None:
+        """
+        Description: Drops every cached result, call after ingesting data the file fingerprint cannot see.
+        """
+        self.generation += 1
+        self.cache.clear()
+
+
+
+    def __ingestVersion(self) -> tuple:
+        files = []
+        for view_name, (path, latest_only) in list(self.local_sources.items()):
+            file_paths = sorted(glob.glob(path))
+            if latest_only and file_paths:
+                file_paths = file_paths[-1:]
+                if file_paths[0] != self.view_files[view_name]:
+                    self.view_files[view_name] = file_paths[0]
+                    self.__createView(view_name, file_paths[0])
+            for file_path in file_paths:
+                stat = os.stat(file_path)
+                files.append((file_path, stat.st_mtime_ns, stat.st_size))
+        return self.generation, tuple(files)
+
+
+
+    def __cacheResult(self, key: tuple, version: tuple, result: pd.DataFrame) -> None:
+        now = time.monotonic()
+        for stale_key in [k for k, (created, _, _) in self.cache.items() if now - created >= self.ttl_seconds]:
+            del self.cache[stale_key]
+        self.cache[key] = (now, version, result)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+
+
+    def query(self, sql: str, params: Union[list, None] = None) -> pd.DataFrame:
+        """
+        Args:
+            sql: query over the registered views
+            params: values for ? placeholders in sql
+
+        Returns:
+            pd.DataFrame: query result, served from cache when still fresh
+        """
+        start = time.perf_counter()
+        key = (sql, tuple(params or ()))
+        version = self.__ingestVersion()
+
+        cached = self.cache.get(key)
+        if cached is not None and cached[1] == version and time.monotonic() - cached[0] < self.ttl_seconds:
+            result = cached[2]
+            self.cache.move_to_end(key)
+            hit = True
+        else:
+            result = self.connection.execute(sql, params or []).df()
+            self.__cacheResult(key, version, result)
+            hit = False
+
+        seconds = time.perf_counter() - start
+        self.timings.append({"sql": sql, "seconds": seconds, "cached": hit})
+        logging.info("Query finished in %.4f seconds (cached: %s)", seconds, hit)
+        return result.copy()
+
+
+
+    def topMovers(self, view_name: str = "market_prices", days: int = 7, n: int = 10) -> pd.DataFrame:
+        """
+        Args:
+            view_name: registered price table
+            days: window length, the latest window is compared against the one before it
+            n: number of commodities to return
+
+        Returns:
+            pd.DataFrame: commodities with the largest relative change of average Modal_Price
+        """
+        view_name = self.__checkViewName(view_name)
+        return self.query(f"""
+            WITH bounds AS (SELECT max(CAST(Arrival_Date AS DATE)) AS last_day FROM {view_name}),
+            windows AS (
+                SELECT Commodity,
+                       avg(Modal_Price) FILTER (WHERE CAST(Arrival_Date AS DATE) > last_day - ?) AS current_avg,
+                       avg(Modal_Price) FILTER (WHERE CAST(Arrival_Date AS DATE) <= last_day - ?) AS previous_avg
+                FROM {view_name}, bounds
+                WHERE CAST(Arrival_Date AS DATE) > last_day - ?
+                GROUP BY Commodity
+            )
+            SELECT Commodity, current_avg, previous_avg, (current_avg - previous_avg) / previous_avg AS change
+            FROM windows
+            WHERE current_avg IS NOT NULL AND previous_avg > 0
+            ORDER BY abs(change) DESC, Commodity
+            LIMIT ?
+        """, [days, days, 2 * days, n])
+
+
+
+    def stateAverages(self, view_name: str = "market_prices", commodity: Union[str, None] = None) -> pd.DataFrame:
+        """
+        Args:
+            view_name: registered price table
+            commodity: restrict to one commodity, or None for all
+
+        Returns:
+            pd.DataFrame: average Min/Max/Modal price per state
+        """
+        view_name = self.__checkViewName(view_name)
+        return self.query(f"""
+            SELECT State, avg(Min_Price) AS avg_min_price, avg(Max_Price) AS avg_max_price,
+                   avg(Modal_Price) AS avg_modal_price, count(*) AS rows
+            FROM {view_name}
+            WHERE ? IS NULL OR Commodity = ?
+            GROUP BY State
+            ORDER BY State
+        """, [commodity, commodity])
+
+
+
+    def priceSpreads(self, view_name: str = "market_prices", n: int = 10) -> pd.DataFrame:
+        """
+        Args:
+            view_name: registered price table
+            n: number of commodity/market pairs to return
+
+        Returns:
+            pd.DataFrame: pairs with the widest average spread between Max_Price and Min_Price
+        """
+        view_name = self.__checkViewName(view_name)
+        return self.query(f"""
+            SELECT Commodity, Market, avg(Max_Price - Min_Price) AS avg_spread,
+                   avg((Max_Price - Min_Price) / nullif(Modal_Price, 0)) AS avg_relative_spread
+            FROM {view_name}
+            GROUP BY Commodity, Market
+            ORDER BY avg_spread DESC, Commodity, Market
+            LIMIT ?
+        """, [n])
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+import os
+from typing import Union
+from src.series_index import SeriesIndex, growArray
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', filemode='a', filename='logs.log')
+
+
+
+class PriceAnomalyDetector:
+    """
+    This class is responsible for flagging anomalous prices per series as batches arrive.
+    - A series is one (State, District, Market, Commodity, Variety, Grade) combination, encoded to a dense integer id
+    - Exponentially weighted mean/variance per series live in flat NumPy arrays indexed by that id
+    - Every row costs O(1) state work, and the state is saved/restored as a single .npz file
+    - Keys of the batches already folded in are part of the state, so replaying a batch never counts it twice
+    """
+
+    series_cols = SeriesIndex.series_cols
+    price_col = "Modal_Price"
+    score_col = "Anomaly_Score"
+    expected_col = "Expected_Price"
+
+    def __init__(self, alpha: float = 0.1, threshold: float = 4.0, warmup: int = 5, min_rel_std: float = 0.01, capacity: int = 1024):
+        """
+        Args:
+            alpha: smoothing factor of the exponentially weighted mean/variance
+            threshold: rows whose z-score against their series exceeds this are flagged
+            warmup: number of observations a series needs before it can be flagged
+            min_rel_std: std floor as a fraction of the mean, so flat price histories do not flag every change
+            capacity: initial number of series slots, grown by doubling
+        """
+        logging.info("Initializing PriceAnomalyDetector with alpha: %s, threshold: %s, warmup: %s", alpha, threshold, warmup)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_rel_std = min_rel_std
+        self.index = SeriesIndex()
+        self.mean = np.zeros(capacity, dtype=np.float64)
+        self.var = np.zeros(capacity, dtype=np.float64)
+        self.count = np.zeros(capacity, dtype=np.uint32)
+        self.seen_batches = set()
+
+
+
+    @property
+    def n_series(self) -> int:
+        return len(self.index)
+
+
+
+    def seriesIds(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Args:
+            X: batch containing series_cols
+
+        Description: Maps every row to its series id, registering series seen for the first time.
+
+        Returns:
+            np.ndarray of int64 series ids
+        """
+        ids = self.index.encode(X)
+        n = self.n_series
+        self.mean = growArray(self.mean, n, len(self.mean))
+        self.var = growArray(self.var, n, len(self.var))
+        self.count = growArray(self.count, n, len(self.count))
+        return ids
+
+
+
+    def update(self, X: pd.DataFrame, batch_key: Union[str, None] = None) -> pd.DataFrame:
+        """
+        Args:
+            X: raw (unscaled) batch in arrival order
+            batch_key: identifier of the batch, a batch whose key was already seen leaves the state unchanged
+
+        Description: Scores every row against its series state before folding the row into that state.
+                     Rows of the same series are applied in order; rows of different series are updated together,
+                     one vectorized round per repeat of a series within the batch.
+
+        Returns:
+            pd.DataFrame: flagged rows with Anomaly_Score and Expected_Price columns
+        """
+        if batch_key is not None and batch_key in self.seen_batches:
+            logging.info("Batch %s already folded into the anomaly state, skipping.", batch_key)
+            return X.iloc[:0].assign(**{self.score_col: np.float64(0), self.expected_col: np.float64(0)})
+        logging.info("Updating anomaly state with batch of %s rows.", len(X))
+        prices = X[self.price_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        ids = self.seriesIds(X)
+        scores = np.zeros(len(X), dtype=np.float64)
+        expected = np.full(len(X), np.nan)
+
+        rows = np.flatnonzero(~np.isnan(prices))
+        rank = pd.Series(ids[rows]).groupby(ids[rows]).cumcount().to_numpy()
+        order = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[order], np.arange(rank.max() + 2 if len(rank) else 1))
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            sel = rows[order[start:end]]
+            i, x = ids[sel], prices[sel]
+            mean, var, count = self.mean[i], self.var[i], self.count[i]
+
+            std = np.maximum(np.sqrt(var), self.min_rel_std * np.abs(mean))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = np.where(std > 0, np.abs(x - mean) / std, np.where(x == mean, 0.0, np.inf))
+            ready = count >= self.warmup
+            scores[sel] = np.where(ready, z, 0.0)
+            expected[sel] = np.where(count > 0, mean, np.nan)
+
+            diff = x - mean
+            incr = self.alpha * diff
+            first = count == 0
+            self.mean[i] = np.where(first, x, mean + incr)
+            self.var[i] = np.where(first, 0.0, (1 - self.alpha) * (var + diff * incr))
+            self.count[i] = count + 1
+
+        if batch_key is not None:
+            self.seen_batches.add(batch_key)
+        flagged = scores > self.threshold
+        anomalies = X[flagged].copy()
+        anomalies[self.score_col] = scores[flagged]
+        anomalies[self.expected_col] = expected[flagged]
+        logging.info("Flagged %s anomalous rows.", len(anomalies))
+        return anomalies
+
+
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: approximate memory held by the state (arrays plus the series id dictionary)
+        """
+        return self.index.nbytes() + self.mean.nbytes + self.var.nbytes + self.count.nbytes
+
+
+
+    def save(self, file_path: str) -> None:
+        """
+        Args:
+            file_path: .npz file receiving the parameters, series state and seen batch keys
+        """
+        n = self.n_series
+        # Written through a file object so np.savez keeps the name, then swapped in so a crash never leaves a torn file.
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                hashes=self.index.hashes, mean=self.mean[:n], var=self.var[:n], count=self.count[:n],
+                params=np.array([self.alpha, self.threshold, self.warmup, self.min_rel_std]),
+                seen_batches=np.array(sorted(self.seen_batches), dtype=str)
+            )
+        os.replace(tmp_path, file_path)
+        logging.info("Anomaly state for %s series saved to %s", n, file_path)
+
+
+
+    @classmethod
+    def load(cls, file_path: str) -> "PriceAnomalyDetector":
+        """
+        Args:
+            file_path: .npz file written by save
+
+        Returns:
+            PriceAnomalyDetector restored with the saved parameters and state
+        """
+        with np.load(file_path) as state:
+            alpha, threshold, warmup, min_rel_std = state["params"].tolist()
+            n = len(state["hashes"])
+            detector = cls(alpha=alpha, threshold=threshold, warmup=int(warmup), min_rel_std=min_rel_std, capacity=max(n, 1024))
+            detector.index = SeriesIndex(hashes=state["hashes"])
+            detector.mean[:n] = state["mean"]
+            detector.var[:n] = state["var"]
+            detector.count[:n] = state["count"]
+            if "seen_batches" in state:
+                detector.seen_batches = set(state["seen_batches"].tolist())
+        logging.info("Anomaly state for %s series loaded from %s", n, file_path)
+        return detector
+
+
+
+    @classmethod
+    def loadOrCreate(cls, file_path: str, **params) -> "PriceAnomalyDetector":
+        if os.path.exists(file_path):
+            return cls.load(file_path)
+        return cls(**params)
+
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.anomaly_detection [n_series] [n_batches]
+    # Every batch holds one row per series; the first batch registers the series, the rest measure steady-state updates.
+    import sys
+    import tempfile
+    import time
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_batches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = np.random.default_rng(0)
+    batch = pd.DataFrame({col: "x" for col in PriceAnomalyDetector.series_cols}, index=range(n_series))
+    batch["Market"] = np.arange(n_series).astype(str)
+    base = rng.uniform(1000, 5000, n_series)
+
+    detector = PriceAnomalyDetector()
+    times = []
+    for _ in range(n_batches + 1):
+        batch["Modal_Price"] = base * rng.uniform(0.98, 1.02, n_series)
+        start = time.perf_counter()
+        detector.update(batch)
+        times.append(time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as folder:
+        state_path = os.path.join(folder, "anomaly_state.npz")
+        start = time.perf_counter()
+        detector.save(state_path)
+        save_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        PriceAnomalyDetector.load(state_path)
+        load_seconds = time.perf_counter() - start
+
+    print(f"series: {detector.n_series}, batches: {n_batches} of {n_series} rows")
+    print(f"first batch (registers series): {n_series / times[0]:,.0f} rows/s")
+    print(f"update median: {n_series / np.median(times[1:]):,.0f} rows/s")
+    print(f"state memory: {detector.nbytes() / 1e6:.1f} MB ({detector.nbytes() / detector.n_series:.0f} B/series)")
+    print(f"save: {save_seconds:.3f}s, load: {load_seconds:.3f}s")
@@ -1,5 +1,6 @@
 from sklearn.preprocessing import OneHotEncoder, LabelEncoder, StandardScaler, MinMaxScaler
 import pandas as pd
+import numpy as np
 from typing import Union
 import joblib
 import os
@@ -69,10 +70,12 @@ class EncodelData:
 
     encoder_passed = False
 
-    def __init__(self, cat_cols: list, method: str, encoder=None):
+    def __init__(self, cat_cols: list, method: str, encoder=None, codes=None):
         logging.info("Initializing EncodelData with method: %s and columns: %s", method, cat_cols)
         self.cat_cols = cat_cols
         self.method = method
+        # Label codes already looked up for these rows (DataValidator.category_codes), reused instead of transform.
+        self.codes = codes or {}
 
         if encoder is not None:
             self.encoder = encoder
@@ -126,7 +129,16 @@ class EncodelData:
 
         elif self.method == "label":
             for col in self.cat_cols:
-                X_copy[col] = self.encoder[col].transform(X_copy[col])
+                codes = self.codes.get(col) if self.encoder_passed else None
+                if codes is not None and len(codes) == len(X_copy):
+                    codes = np.array(codes)
+                    # Missing values were imputed after the lookup, so only those rows still need transform.
+                    missing = (codes < 0) | (codes >= len(self.encoder[col].classes_))
+                    if missing.any():
+                        codes[missing] = self.encoder[col].transform(X_copy[col][missing])
+                    X_copy[col] = codes
+                else:
+                    X_copy[col] = self.encoder[col].transform(X_copy[col])
                 joblib.dump(self.encoder[col], os.path.join(processing_configs['label_encoder_folder_path'], col + '.pkl'))
                 logging.info("LabelEncoder for column '%s' saved successfully.", col)
 
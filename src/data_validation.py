@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+from typing import Union
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', filemode='a', filename='logs.log')
+
+
+
+# Declarative rule set checked before processData. Every rule is compiled into a
+# vectorized violation mask, so adding a rule here never adds a per-row loop.
+DEFAULT_RULES = [
+    {"name": "unparsable_price", "kind": "numeric", "cols": ["Min_Price", "Max_Price", "Modal_Price"]},
+    {"name": "negative_price", "kind": "non_negative", "cols": ["Min_Price", "Max_Price", "Modal_Price"]},
+    {"name": "min_above_max", "kind": "less_equal", "left": "Min_Price", "right": "Max_Price"},
+    {"name": "modal_out_of_range", "kind": "between", "col": "Modal_Price", "low": "Min_Price", "high": "Max_Price"},
+    {"name": "bad_arrival_date", "kind": "date", "col": "Arrival_Date", "format": "%Y-%m-%d"},
+    {"name": "unknown_category", "kind": "known_category"},
+    {"name": "duplicate_row", "kind": "unique"},
+]
+
+
+
+class DataValidator:
+    """
+    This class is responsible for validating raw rows before processing.
+    - Rules are compiled into boolean violation masks evaluated in a single pass per batch
+    - Bad rows are quarantined with reason codes instead of failing the batch
+    - Per-rule violation counts are kept in `violation_counts`
+    - Category lookups are kept as codes in `category_codes`, so label encoding can reuse them
+    """
+
+    reason_col = "Reason_Code"
+    reasons_col = "Reasons"
+
+    def __init__(self, rules: Union[list, None] = None, categories: Union[dict, None] = None):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.categories = categories or {}
+        if len(self.rules) > 62:
+            raise ValueError("At most 62 rules are supported by the int64 reason code")
+        self.numeric_cols = self.__numericCols(self.rules)
+        # Missing values are left to the Imputer, so NaN counts as a known category (coded as len(values)).
+        self.category_index = {col: pd.Index(np.append(pd.unique(np.asarray(values, dtype=object)), np.nan)) for col, values in self.categories.items()}
+        self.category_codes = {}
+        self.checks = [self.__compileRule(rule) for rule in self.rules]
+        self.violation_counts = {rule["name"]: 0 for rule in self.rules}
+        logging.info("Initialized DataValidator with rules: %s", [rule["name"] for rule in self.rules])
+
+
+
+    @classmethod
+    def fromEncoder(cls, encoder: Union[None, dict], rules: Union[list, None] = None) -> "DataValidator":
+        """
+        Args:
+            encoder: dictionary of column as key and respective fitted LabelEncoder, or None
+            rules: rule definitions, defaults to DEFAULT_RULES
+
+        Description: Builds a validator whose known categories are the classes seen by fitted label encoders,
+                     so rows that would crash LabelEncoder.transform are quarantined instead.
+
+        Returns:
+            DataValidator
+        """
+        categories = {}
+        if isinstance(encoder, dict):
+            categories = {col: enc.classes_ for col, enc in encoder.items()}
+        return cls(rules=rules, categories=categories)
+
+
+
+    @staticmethod
+    def __numericCols(rules: list) -> list:
+        cols = []
+        for rule in rules:
+            if rule["kind"] in ("numeric", "non_negative"):
+                cols += rule["cols"]
+            elif rule["kind"] == "less_equal":
+                cols += [rule["left"], rule["right"]]
+            elif rule["kind"] == "between":
+                cols += [rule["col"], rule["low"], rule["high"]]
+        return list(dict.fromkeys(cols))
+
+
+
+    def __knownMask(self, X: pd.DataFrame, batch: dict, col: str) -> np.ndarray:
+        # The category lookup is the most expensive check, so each column is looked up at most once per batch
+        # and its codes are shared by every rule that needs them, then handed on to label encoding.
+        if col not in batch["codes"]:
+            batch["codes"][col] = self.category_index[col].get_indexer(X[col])
+        return batch["codes"][col] >= 0
+
+
+
+    @staticmethod
+    def __bits(values: pd.Series) -> np.ndarray:
+        # Raw 64-bit patterns of a numeric column; values pandas treats as equal always get equal bits.
+        array = values.to_numpy()
+        if array.dtype.kind in "iu":
+            return array.astype(np.int64, copy=False).view(np.uint64)
+        array = values.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0  # + 0.0 folds -0.0 into 0.0
+        array[np.isnan(array)] = np.nan
+        return array.view(np.uint64)
+
+
+
+    def __compileRule(self, rule: dict):
+        # Every check takes the raw batch X and a per-batch dict holding the numeric columns converted once
+        # with errors="coerce" (so one malformed value cannot make a comparison raise) and cached isin masks.
+        kind = rule["kind"]
+
+        if kind == "numeric":
+            cols = rule["cols"]
+            def check(X: pd.DataFrame, batch: dict) -> np.ndarray:
+                mask = np.zeros(len(X), dtype=bool)
+                for col in cols:
+                    if not pd.api.types.is_numeric_dtype(X[col]):
+                        mask |= np.isnan(batch["numeric"][col]) & X[col].notna().to_numpy()
+                return mask
+            return check
+
+        elif kind == "non_negative":
+            cols = rule["cols"]
+            def check(X: pd.DataFrame, batch: dict) -> np.ndarray:
+                mask = np.zeros(len(X), dtype=bool)
+                for col in cols:
+                    mask |= batch["numeric"][col] < 0
+                return mask
+            return check
+
+        elif kind == "less_equal":
+            left, right = rule["left"], rule["right"]
+            return lambda X, batch: batch["numeric"][left] > batch["numeric"][right]
+
+        elif kind == "between":
+            col, low, high = rule["col"], rule["low"], rule["high"]
+            return lambda X, batch: (batch["numeric"][col] < batch["numeric"][low]) | (batch["numeric"][col] > batch["numeric"][high])
+
+        elif kind == "date":
+            col, fmt = rule["col"], rule.get("format")
+            def check(X: pd.DataFrame, batch: dict) -> np.ndarray:
+                # Dates repeat heavily within a batch, so parse the distinct values only. Values the fitted
+                # encoder already knows were parsed when it was fitted, so only the unknown ones are left.
+                values = X[col]
+                if col in self.category_index:
+                    known = self.__knownMask(X, batch, col)
+                    if known.all():
+                        return np.zeros(len(X), dtype=bool)
+                    values = values[~known]
+                values = pd.unique(values)
+                values = values[~pd.isna(values)]
+                bad_values = values[pd.isna(pd.to_datetime(values, format=fmt, errors="coerce"))]
+                if len(bad_values) == 0:
+                    return np.zeros(len(X), dtype=bool)
+                return X[col].isin(bad_values).to_numpy()
+            return check
+
+        elif kind == "known_category":
+            def check(X: pd.DataFrame, batch: dict) -> np.ndarray:
+                mask = np.zeros(len(X), dtype=bool)
+                for col in self.category_index:
+                    if col in X.columns:
+                        mask |= ~self.__knownMask(X, batch, col)
+                return mask
+            return check
+
+        elif kind == "unique":
+            subset = rule.get("cols")
+            def check(X: pd.DataFrame, batch: dict) -> np.ndarray:
+                # A duplicate row also repeats the key mixed from the bits of its numeric columns, which is far
+                # cheaper to build than a hash of the strings, so only those candidates get the full comparison.
+                cols = X.columns if subset is None else subset
+                num_cols = [col for col in cols if pd.api.types.is_numeric_dtype(X[col])]
+                if num_cols:
+                    key = np.zeros(len(X), dtype=np.uint64)
+                    for col in num_cols:
+                        key ^= self.__bits(X[col])
+                        key *= np.uint64(0x9E3779B97F4A7C15)
+                    # Sorting the keys is much faster than a hash table pass, and clean batches stop here.
+                    sorted_key = np.sort(key)
+                    repeated = np.unique(sorted_key[1:][sorted_key[1:] == sorted_key[:-1]])
+                    if len(repeated):
+                        candidates = pd.Series(key).isin(repeated).to_numpy()
+                    else:
+                        candidates = np.zeros(len(X), dtype=bool)
+                else:
+                    candidates = np.ones(len(X), dtype=bool)
+                mask = np.zeros(len(X), dtype=bool)
+                if candidates.any():
+                    mask[candidates] = X[candidates].duplicated(subset=subset, keep="first").to_numpy()
+                return mask
+            return check
+
+        else:
+            logging.error("Invalid validation rule kind: %s", kind)
+            raise ValueError("Choose rule kind from ('numeric', 'non_negative', 'less_equal', 'between', 'date', 'known_category', 'unique')")
+
+
+
+    def validate(self, X: pd.DataFrame) -> tuple:
+        """
+        Args:
+            X: unprocessed batch
+
+        Description: Evaluates every rule on the batch and splits it into valid and quarantined rows.
+                     Quarantined rows get a bitmask `Reason_Code` (bit i set for rule i) and readable `Reasons`.
+                     `category_codes` then holds, per category column, the position of every valid row's value in the
+                     known categories; built by fromEncoder these are the LabelEncoder codes, missing values coded as
+                     len(classes_).
+
+        Returns:
+            (valid_df, quarantined_df)
+        """
+        logging.info("Validating batch of %s rows.", len(X))
+        numeric = {}
+        for col in self.numeric_cols:
+            values = X[col] if pd.api.types.is_numeric_dtype(X[col]) else pd.to_numeric(X[col], errors="coerce")
+            array = values.to_numpy()
+            # Plain NumPy columns are compared as they are, nullable / object results are normalised to float with NaN.
+            numeric[col] = array if array.dtype.kind in "iuf" else values.to_numpy(dtype=np.float64, na_value=np.nan)
+        batch = {"numeric": numeric, "codes": {}}
+
+        masks = np.empty((len(self.checks), len(X)), dtype=bool)
+        for i, check in enumerate(self.checks):
+            masks[i] = check(X, batch)
+
+        bad = masks.any(axis=0)
+        bad_masks = masks[:, bad]
+        counts = np.count_nonzero(bad_masks, axis=1)
+        for rule, count in zip(self.rules, counts):
+            self.violation_counts[rule["name"]] += int(count)
+
+        valid = X[~bad] if bad.any() else X
+        self.category_codes = {col: codes[~bad] if bad.any() else codes for col, codes in batch["codes"].items()}
+        # Columns read as strings because of a malformed value are handed on as their converted numbers.
+        converted = [col for col in numeric if not pd.api.types.is_numeric_dtype(X[col])]
+        if converted:
+            valid = valid.copy()
+            for col in converted:
+                valid[col] = numeric[col][~bad]
+        quarantined = X[bad].copy() if bad.any() else X.iloc[:0].copy()
+
+        bits = np.left_shift(np.int64(1), np.arange(len(self.checks), dtype=np.int64))
+        quarantined[self.reason_col] = bits @ bad_masks.astype(np.int64)
+        reasons = np.full(bad_masks.shape[1], "", dtype=object)
+        for rule, mask in zip(self.rules, bad_masks):
+            reasons[mask] += rule["name"] + ";"
+        quarantined[self.reasons_col] = [reason.rstrip(";") for reason in reasons]
+
+        logging.info("Validation completed: %s valid, %s quarantined, counts: %s",
+                     len(valid), len(quarantined), dict(zip([rule["name"] for rule in self.rules], counts.tolist())))
+        return valid, quarantined
+
+
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.data_validation [rows] [repeats]
+    # Median times of validate and processData with fitted artifacts, as runProcessingPipeline calls them.
+    # The overhead is what validating adds to processing a batch, with label encoding reusing the validator's codes.
+    import sys
+    import tempfile
+    import time
+    import warnings
+    from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+    from data_processing_pipeline import processData
+    from src import data_processing
+    warnings.filterwarnings("ignore")
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    sample = pd.read_csv("test_code/test_row_data.csv")
+    df = sample.sample(n_rows, replace=True, random_state=0).reset_index(drop=True)
+    df["Commodity_Code"] = np.arange(n_rows)
+    cat_cols = df.select_dtypes(include="object").columns
+    num_cols = df.select_dtypes(exclude="object").columns
+    encoder = {col: LabelEncoder().fit(df[col]) for col in cat_cols}
+    scaler = MinMaxScaler().fit(df[num_cols])
+    validator = DataValidator.fromEncoder(encoder)
+    # processData saves the label encoders it is given, keep the tracked ones untouched.
+    data_processing.processing_configs["label_encoder_folder_path"] = tempfile.mkdtemp()
+
+    def median(func) -> float:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+
+    validate_seconds = median(lambda: validator.validate(df))
+    process_seconds = median(lambda: processData(df, scaler=scaler, encoder=encoder))
+    reuse_seconds = median(lambda: processData(df, scaler=scaler, encoder=encoder, category_codes=validator.category_codes))
+    print(f"rows: {n_rows}, repeats: {repeats}")
+    print(f"validate median: {validate_seconds:.3f}s")
+    print(f"processData median: {process_seconds:.3f}s")
+    print(f"processData with category_codes median: {reuse_seconds:.3f}s")
+    print(f"validate / processData: {validate_seconds / process_seconds:.1%}")
+    print(f"overhead (validate + processData with codes vs processData): {(validate_seconds + reuse_seconds) / process_seconds - 1:+.1%}")
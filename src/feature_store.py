@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import os
+from typing import Union
+from src.series_index import SeriesIndex, growArray
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', filemode='a', filename='logs.log')
+
+
+
+class PriceFeatureStore:
+    """
+    This class is responsible for serving the most recent prices of every series.
+    - Every series owns a fixed-size ring buffer row in one preallocated (series x window) NumPy arena
+    - Batches from the processing pipeline are appended incrementally, without re-reading history
+    - The arena is snapshotted as .npy files and memory-mapped on restore for fast restarts
+    - Keys of the ingested batches are snapshotted too, so replaying a batch never appends it twice
+    """
+
+    series_cols = SeriesIndex.series_cols
+    price_col = "Modal_Price"
+    date_col = "Arrival_Date"
+    arrays = ("prices", "days", "head", "length")
+    missing_day = np.iinfo(np.int32).min
+
+    def __init__(self, window: int = 30, capacity: int = 1024):
+        """
+        Args:
+            window: number of most recent prices kept per series
+            capacity: initial number of series slots, grown by doubling
+        """
+        logging.info("Initializing PriceFeatureStore with window: %s", window)
+        self.window = window
+        self.index = SeriesIndex()
+        self.prices = np.full((capacity, window), np.nan, dtype=np.float32)
+        self.days = np.full((capacity, window), self.missing_day, dtype=np.int32)
+        self.head = np.zeros(capacity, dtype=np.int32)
+        self.length = np.zeros(capacity, dtype=np.int32)
+        self.seen_batches = set()
+
+
+
+    @property
+    def n_series(self) -> int:
+        return len(self.index)
+
+
+
+    def seriesIds(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Args:
+            X: rows containing series_cols
+
+        Returns:
+            np.ndarray of int64 series ids, -1 for series the store has never seen
+        """
+        return self.index.encode(X, register=False)
+
+
+
+    def append(self, X: pd.DataFrame, batch_key: Union[str, None] = None) -> None:
+        """
+        Args:
+            X: raw (unscaled) batch in arrival order
+            batch_key: identifier of the batch, a batch whose key was already ingested is ignored
+
+        Description: Writes every row into the ring buffer of its series. Only the last `window` rows
+                     of a series in the batch can survive, so earlier ones are dropped before writing,
+                     which keeps every write position unique and the whole append vectorized.
+        """
+        if batch_key is not None and batch_key in self.seen_batches:
+            logging.info("Batch %s already in the feature store, skipping.", batch_key)
+            return
+        logging.info("Appending batch of %s rows to the feature store.", len(X))
+        ids = self.index.encode(X)
+        n = self.n_series
+        used = len(self.head)
+        self.prices = growArray(self.prices, n, used, fill=np.nan)
+        self.days = growArray(self.days, n, used, fill=self.missing_day)
+        self.head = growArray(self.head, n, used)
+        self.length = growArray(self.length, n, used)
+
+        prices = X[self.price_col].to_numpy(dtype=np.float32, na_value=np.nan)
+        dates = pd.to_datetime(X[self.date_col], errors="coerce").to_numpy().astype("datetime64[D]")
+        days = np.where(np.isnat(dates), self.missing_day, dates.astype(np.int64)).astype(np.int32)
+        rows = np.flatnonzero(~np.isnan(prices))
+        ids, prices, days = ids[rows], prices[rows], days[rows]
+
+        series = pd.Series(ids)
+        rank = series.groupby(ids).cumcount().to_numpy(dtype=np.int64)
+        total = series.map(series.value_counts()).to_numpy(dtype=np.int64)
+        keep = rank >= total - self.window
+        ids, prices, days = ids[keep], prices[keep], days[keep]
+        rank = rank[keep] - (total[keep] - np.minimum(total[keep], self.window))
+
+        pos = (self.head[ids] + rank) % self.window
+        self.prices[ids, pos] = prices
+        self.days[ids, pos] = days
+
+        touched, counts = np.unique(ids, return_counts=True)
+        self.head[touched] = (self.head[touched] + counts) % self.window
+        self.length[touched] = np.minimum(self.length[touched] + counts, self.window)
+        if batch_key is not None:
+            self.seen_batches.add(batch_key)
+
+
+
+    def getFeatures(self, series_ids: np.ndarray) -> tuple:
+        """
+        Args:
+            series_ids: ids from seriesIds
+
+        Description: Gathers the ring buffers of all requested series in one vectorized lookup.
+                     Each row is ordered oldest to newest and left-padded with NaN / NaT
+                     when the series has fewer than `window` prices (or is unknown).
+
+        Returns:
+            (prices, dates): float32 (len(series_ids), window) and datetime64[D] arrays of the same shape
+        """
+        series_ids = np.asarray(series_ids, dtype=np.int64)
+        if self.n_series == 0:
+            shape = (len(series_ids), self.window)
+            return np.full(shape, np.nan, dtype=np.float32), np.full(shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        known = (series_ids >= 0) & (series_ids < self.n_series)
+        ids = np.where(known, series_ids, 0)
+
+        offsets = np.arange(self.window)
+        pos = (self.head[ids, None] + offsets) % self.window
+        prices = self.prices[ids[:, None], pos]
+        days = self.days[ids[:, None], pos]
+        dates = days.astype(np.int64).astype("datetime64[D]")
+
+        missing = ~known[:, None] | (offsets < self.window - self.length[ids, None])
+        prices[missing] = np.nan
+        dates[missing | (days == self.missing_day)] = np.datetime64("NaT")
+        return prices, dates
+
+
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: approximate memory held by the store (arena plus the series id dictionary)
+        """
+        return self.index.nbytes() + sum(getattr(self, name).nbytes for name in self.arrays)
+
+
+
+    def snapshot(self, folder_path: str) -> None:
+        """
+        Args:
+            folder_path: folder receiving one .npy file per arena array plus the series hashes and seen batch keys
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        n = self.n_series
+        for name in self.arrays:
+            self.__saveArray(folder_path, name, getattr(self, name)[:n])
+        self.__saveArray(folder_path, "seen_batches", np.array(sorted(self.seen_batches), dtype=str))
+        self.__saveArray(folder_path, "hashes", self.index.hashes)
+        logging.info("Feature store with %s series snapshotted to %s", n, folder_path)
+
+
+
+    @staticmethod
+    def __saveArray(folder_path: str, name: str, array: np.ndarray) -> None:
+        tmp_path = os.path.join(folder_path, name + ".tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(folder_path, name + ".npy"))
+
+
+
+    @classmethod
+    def restore(cls, folder_path: str) -> "PriceFeatureStore":
+        """
+        Args:
+            folder_path: folder written by snapshot
+
+        Description: Memory-maps the snapshot copy-on-write, so restarting only touches the pages that are read
+                     and later appends never modify the snapshot files.
+
+        Returns:
+            PriceFeatureStore
+        """
+        arrays = {name: np.load(os.path.join(folder_path, name + ".npy"), mmap_mode="c") for name in cls.arrays}
+        store = cls(window=arrays["prices"].shape[1], capacity=0)
+        for name, array in arrays.items():
+            setattr(store, name, array)
+        store.index = SeriesIndex(hashes=np.load(os.path.join(folder_path, "hashes.npy")))
+        seen_path = os.path.join(folder_path, "seen_batches.npy")
+        if os.path.exists(seen_path):
+            store.seen_batches = set(np.load(seen_path).tolist())
+        logging.info("Feature store with %s series restored from %s", store.n_series, folder_path)
+        return store
+
+
+
+    @classmethod
+    def restoreOrCreate(cls, folder_path: str, window: int = 30) -> "PriceFeatureStore":
+        """
+        Args:
+            folder_path: folder written by snapshot
+            window: window of a newly created store
+
+        Description: A restored store keeps the window it was snapshotted with, since the ring buffers
+                     cannot be resized without losing their order; a different window is logged as a warning.
+
+        Returns:
+            PriceFeatureStore
+        """
+        if os.path.exists(os.path.join(folder_path, "hashes.npy")):
+            store = cls.restore(folder_path)
+            if store.window != window:
+                logging.warning("Feature store restored from %s has window %s instead of the requested %s, "
+                                "delete the snapshot to rebuild it with the new window.", folder_path, store.window, window)
+            return store
+        return cls(window=window)
+
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m src.feature_store [n_series] [window]
+    # Fills the store with a full window per series, then measures median getFeatures latency per lookup size.
+    import sys
+    import tempfile
+    import time
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rng = np.random.default_rng(0)
+    batch = pd.DataFrame({col: "x" for col in PriceFeatureStore.series_cols}, index=range(n_series))
+    batch["Market"] = np.arange(n_series).astype(str)
+
+    store = PriceFeatureStore(window=window)
+    start = time.perf_counter()
+    for day in range(window):
+        batch["Modal_Price"] = rng.uniform(1000, 5000, n_series)
+        batch["Arrival_Date"] = str(np.datetime64("2024-01-01") + day)
+        store.append(batch)
+    append_seconds = (time.perf_counter() - start) / window
+
+    print(f"series: {store.n_series}, window: {window}")
+    print(f"append: {n_series / append_seconds:,.0f} rows/s")
+    for size in (1, 100, 10_000):
+        times = []
+        for _ in range(101 if size < 10_000 else 21):
+            ids = rng.integers(0, n_series, size)
+            start = time.perf_counter()
+            store.getFeatures(ids)
+            times.append(time.perf_counter() - start)
+        print(f"getFeatures median for {size} ids: {np.median(times) * 1e6:,.0f}us")
+    print(f"memory: {store.nbytes() / 1e6:.1f} MB ({store.nbytes() / store.n_series:.0f} B/series)")
+
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        store.snapshot(folder)
+        snapshot_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        PriceFeatureStore.restore(folder)
+        restore_seconds = time.perf_counter() - start
+    print(f"snapshot: {snapshot_seconds:.3f}s, restore: {restore_seconds:.3f}s")
@@ -0,0 +1,175 @@
+import hashlib
+import joblib
+import os
+import time
+import pandas as pd
+from typing import Union
+import logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', filemode='a', filename='logs.log')
+
+
+
+class ProcessingCache:
+    """
+    This class is responsible for memoizing processed batches on local disk.
+    - Entries are keyed by a content hash of the raw batch plus artifact version and processing parameters
+    - The least recently used entries are evicted once the folder grows past max_size_bytes
+    - Hits, misses and compute time saved are tracked per instance (i.e. per run)
+    - Uploads of a batch are recorded as marker files that eviction never touches
+    """
+
+    def __init__(self, cache_folder: str, max_size_bytes: int = 1024 ** 3):
+        logging.info("Initializing ProcessingCache at %s with max size %s bytes", cache_folder, max_size_bytes)
+        self.cache_folder = cache_folder
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+        self.uploaded_folder = os.path.join(cache_folder, "uploaded")
+        os.makedirs(cache_folder, exist_ok=True)
+
+
+
+    @staticmethod
+    def artifactVersion(*artifacts) -> str:
+        """
+        Args:
+            artifacts: fitted scaler / encoder objects (None when they are fitted per batch)
+
+        Returns:
+            str: stable hash of the artifacts, changes whenever a refit changes their state
+        """
+        return joblib.hash(artifacts)
+
+
+
+    def makeKey(self, df: pd.DataFrame, artifact_version: str, **params) -> str:
+        """
+        Args:
+            df: unprocessed batch
+            artifact_version: version string from artifactVersion
+            params: processing parameters (num_impute_method, scale_method, encoder_method ...)
+
+        Returns:
+            str: hex digest identifying the batch contents, schema, artifacts and parameters
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+        digest.update(artifact_version.encode())
+        digest.update(repr(sorted(params.items())).encode())
+        return digest.hexdigest()
+
+
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.cache_folder, key + ".pkl")
+
+
+
+    def get(self, key: str) -> Union[pd.DataFrame, None]:
+        """
+        Returns:
+            cached processed batch, or None on a miss
+        """
+        path = self.__path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        start = time.perf_counter()
+        try:
+            df, compute_seconds = joblib.load(path)
+        except Exception as e:
+            logging.warning("Dropping unreadable cache entry %s: %s", path, e)
+            os.remove(path)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        self.time_saved += max(compute_seconds - (time.perf_counter() - start), 0.0)
+        logging.info("Cache hit for batch %s", key)
+        return df
+
+
+
+    def put(self, key: str, df: pd.DataFrame, compute_seconds: float) -> None:
+        """
+        Args:
+            key: key from makeKey
+            df: processed batch
+            compute_seconds: time it took to process the batch, used to report time saved on later hits
+        """
+        tmp_path = self.__path(key) + ".tmp"
+        joblib.dump((df, compute_seconds), tmp_path)
+        os.replace(tmp_path, self.__path(key))
+        self.evict()
+
+
+
+    def evict(self) -> None:
+        """
+        Description: Removes least recently used entries until the cache fits in max_size_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_folder):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_folder, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            os.remove(os.path.join(self.cache_folder, name))
+            total_size -= size
+            logging.info("Evicted cache entry %s", name)
+
+
+
+    def __markerPath(self, key: str, target: str) -> str:
+        marker = hashlib.blake2b((key + "\0" + target).encode(), digest_size=20).hexdigest()
+        return os.path.join(self.uploaded_folder, marker)
+
+
+
+    def isUploaded(self, key: str, target: str) -> bool:
+        """
+        Args:
+            key: key of the batch
+            target: destination the batch is appended to, e.g. an S3 file key
+
+        Returns:
+            bool: whether markUploaded was called for this batch and target
+        """
+        return os.path.exists(self.__markerPath(key, target))
+
+
+
+    def markUploaded(self, key: str, target: str) -> None:
+        """
+        Args:
+            key: key of the batch
+            target: destination the batch was appended to
+
+        Description: Call only after the append succeeded, so a crash in between uploads the batch again
+                     instead of losing it.
+        """
+        os.makedirs(self.uploaded_folder, exist_ok=True)
+        open(self.__markerPath(key, target), "w").close()
+
+
+
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+
+    def report(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hitRate(),
+            "time_saved_seconds": self.time_saved,
+        }
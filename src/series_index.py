@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from typing import Union
+
+
+
+class SeriesIndex:
+    """
+    This class is responsible for encoding price series to dense integer ids.
+    - A series is one (State, District, Market, Commodity, Variety, Grade) combination
+    - Rows are hashed to uint64 and mapped to ids in order of first appearance
+    - Ids index the flat NumPy arrays that per-series state lives in
+    """
+
+    series_cols = ["State", "District", "Market", "Commodity", "Variety", "Grade"]
+
+    def __init__(self, hashes: Union[np.ndarray, None] = None):
+        hashes = np.zeros(0, dtype=np.uint64) if hashes is None else np.asarray(hashes, dtype=np.uint64)
+        self.buffer = np.zeros(max(len(hashes), 1024), dtype=np.uint64)
+        self.buffer[:len(hashes)] = hashes
+        self.lookup = dict(zip(hashes.tolist(), range(len(hashes))))
+
+
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+
+
+    @property
+    def hashes(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: hash of every registered series, position i holds series id i
+        """
+        return self.buffer[:len(self.lookup)]
+
+
+
+    def encode(self, X: pd.DataFrame, register: bool = True) -> np.ndarray:
+        """
+        Args:
+            X: rows containing series_cols
+            register: assign new ids to unseen series, otherwise they are returned as -1
+
+        Returns:
+            np.ndarray of int64 series ids
+        """
+        hashes = pd.util.hash_pandas_object(X[self.series_cols], index=False).to_numpy()
+        lookup = self.lookup
+        ids = np.fromiter((lookup.get(h, -1) for h in hashes.tolist()), dtype=np.int64, count=len(hashes))
+
+        new = ids < 0
+        if register and new.any():
+            new_hashes = pd.unique(hashes[new])
+            start = len(lookup)
+            if start + len(new_hashes) > len(self.buffer):
+                self.buffer = growArray(self.buffer, start + len(new_hashes), start)
+            self.buffer[start:start + len(new_hashes)] = new_hashes
+            lookup.update(zip(new_hashes.tolist(), range(start, start + len(new_hashes))))
+            ids[new] = np.fromiter((lookup[h] for h in hashes[new].tolist()), dtype=np.int64, count=int(new.sum()))
+        return ids
+
+
+
+    def nbytes(self) -> int:
+        # Each dict entry holds two int objects (~32 bytes each) plus its table slot.
+        return self.buffer.nbytes + len(self.lookup) * 100
+
+
+
+def growArray(array: np.ndarray, size: int, used: int, fill=0) -> np.ndarray:
+    """
+    Args:
+        array: per-series array whose first axis is indexed by series id
+        size: number of slots needed
+        used: number of leading slots holding data
+        fill: value of the new slots
+
+    Description: Doubles the first axis until it fits size, keeping the used slots.
+
+    Returns:
+        np.ndarray: the array itself when it is already large enough, otherwise the grown copy
+    """
+    capacity = max(len(array), 1)
+    if size <= capacity:
+        return array
+    while capacity < size:
+        capacity *= 2
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+from src.analytics import PriceAnalytics
+from row_data_conversion import BuildTable
+
+
+def test_analytics_queries_and_cache_invalidation(tmp_path):
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    builder = BuildTable(read_folder=str(tmp_path), save_folder_path=str(tmp_path))
+    builder.saveData(df, "market_prices_20250101-000000.csv")
+
+    analytics = PriceAnalytics(ttl_seconds=60)
+    analytics.registerBuildTable(builder)
+
+    averages = analytics.stateAverages()
+    expected = df.groupby("State")["Modal_Price"].mean()
+    assert averages.set_index("State")["avg_modal_price"].to_dict() == expected.to_dict()
+
+    spreads = analytics.priceSpreads(n=3)
+    assert spreads["avg_spread"].iloc[0] == (df["Max_Price"] - df["Min_Price"]).groupby([df["Commodity"], df["Market"]]).mean().max()
+
+    count_sql = "SELECT count(*) AS n FROM market_prices"
+    assert analytics.query(count_sql)["n"].iloc[0] == len(df)
+    assert analytics.query(count_sql)["n"].iloc[0] == len(df)
+    assert analytics.timings[-1]["cached"]
+
+    # A newer snapshot holds every earlier row again, so only it is counted.
+    builder.saveData(pd.concat([df, df.head(5)]), "market_prices_20250102-000000.csv")
+    assert analytics.query(count_sql)["n"].iloc[0] == len(df) + 5
+    assert not analytics.timings[-1]["cached"]
+
+    analytics.ttl_seconds = 0
+    analytics.query(count_sql)
+    assert not analytics.timings[-1]["cached"]
+
+
+def test_analytics_top_movers(tmp_path):
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    df.to_csv(os.path.join(tmp_path, "market_prices_1.csv"), index=False)
+    analytics = PriceAnalytics()
+    analytics.registerFolder("market_prices", str(tmp_path))
+
+    dates = pd.to_datetime(df["Arrival_Date"])
+    last_day = dates.max()
+    current = df[dates > last_day - pd.Timedelta(days=7)].groupby("Commodity")["Modal_Price"].mean()
+    previous = df[(dates <= last_day - pd.Timedelta(days=7)) & (dates > last_day - pd.Timedelta(days=14))].groupby("Commodity")["Modal_Price"].mean()
+    change = ((current - previous) / previous).dropna()
+    change = change[previous[change.index] > 0]
+    expected = change.reindex(change.abs().sort_values(ascending=False, kind="stable").index)
+
+    movers = analytics.topMovers(days=7, n=2)
+    assert len(expected) > 2
+    assert movers["change"].abs().tolist() == pytest.approx(expected.abs().iloc[:2].tolist())
+    assert set(movers["Commodity"]) <= set(expected.index)
+    for commodity, row in movers.set_index("Commodity").iterrows():
+        assert row["change"] == pytest.approx(expected[commodity])
+
+
+def test_analytics_cache_and_timings_are_bounded(tmp_path):
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    df.to_csv(os.path.join(tmp_path, "market_prices_1.csv"), index=False)
+    analytics = PriceAnalytics(max_entries=2, max_timings=3)
+    analytics.registerFolder("market_prices", str(tmp_path))
+
+    count_sql = "SELECT count(*) AS n FROM market_prices WHERE Modal_Price > ?"
+    for threshold in (0, 1000, 0, 2000):
+        analytics.query(count_sql, [threshold])
+    assert list(analytics.cache) == [(count_sql, (0,)), (count_sql, (2000,))]
+    assert len(analytics.timings) == 3
+
+    analytics.ttl_seconds = 0
+    analytics.query(count_sql, [3000])
+    assert list(analytics.cache) == [(count_sql, (3000,))]
@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+from src.anomaly_detection import PriceAnomalyDetector
+
+
+def test_detector_flags_price_spike_and_restores_state(tmp_path):
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    rng = np.random.default_rng(0)
+    detector = PriceAnomalyDetector()
+
+    for _ in range(20):
+        batch = df.copy()
+        batch["Modal_Price"] = batch["Modal_Price"] * rng.uniform(0.98, 1.02, len(batch))
+        assert detector.update(batch).empty
+    assert detector.n_series == df.drop_duplicates(PriceAnomalyDetector.series_cols).shape[0]
+
+    state_path = os.path.join(tmp_path, "anomaly_state.npz")
+    detector.save(state_path)
+    restored = PriceAnomalyDetector.load(state_path)
+
+    spike = df.copy()
+    spike.loc[3, "Modal_Price"] *= 3
+    anomalies = restored.update(spike)
+    assert list(anomalies.index) == [3]
+    assert anomalies["Anomaly_Score"].iloc[0] > restored.threshold
+    assert anomalies["Expected_Price"].iloc[0] == np.float64(detector.mean[detector.seriesIds(spike.iloc[[3]])[0]])
+
+
+def test_detector_applies_repeated_series_in_order():
+    batch = pd.DataFrame({col: ["a"] for col in PriceAnomalyDetector.series_cols})
+    batch = pd.concat([batch] * 4, ignore_index=True)
+    batch["Modal_Price"] = [100.0, 110.0, np.nan, 120.0]
+
+    detector = PriceAnomalyDetector(alpha=0.5)
+    detector.update(batch)
+    assert detector.n_series == 1
+    assert detector.count[0] == 3
+    assert detector.mean[0] == 112.5
+
+
+def test_detector_skips_seen_batches_across_restarts(tmp_path):
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    detector = PriceAnomalyDetector()
+    detector.update(df, batch_key="batch-0")
+    count = detector.count.copy()
+
+    skipped = detector.update(df, batch_key="batch-0")
+    assert skipped.empty and {"Anomaly_Score", "Expected_Price"} <= set(skipped.columns)
+    np.testing.assert_array_equal(detector.count, count)
+
+    state_path = os.path.join(tmp_path, "anomaly_state.npz")
+    detector.save(state_path)
+    assert os.listdir(tmp_path) == ["anomaly_state.npz"]
+    restored = PriceAnomalyDetector.load(state_path)
+    assert restored.seen_batches == {"batch-0"}
+    restored.update(df, batch_key="batch-0")
+    np.testing.assert_array_equal(restored.count[:restored.n_series], count[:detector.n_series])
@@ -0,0 +1,70 @@
+import pandas as pd
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+from data_processing_pipeline import processData
+from src import data_processing
+from src.data_validation import DataValidator
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+
+
+def test_validator_quarantines_bad_rows():
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    bad = df.iloc[:5].copy()
+    bad.loc[bad.index[0], "Min_Price"] = -1
+    bad.loc[bad.index[1], ["Min_Price", "Max_Price"]] = [2000, 1000]
+    bad.loc[bad.index[2], "Modal_Price"] = 10 ** 6
+    bad.loc[bad.index[3], "Arrival_Date"] = "not-a-date"
+    bad.loc[bad.index[4], "Commodity"] = "Unknown Commodity"
+    df = pd.concat([df, bad, df.iloc[[10]]], ignore_index=True)
+
+    validator = DataValidator(categories={"Commodity": df["Commodity"].iloc[:79].unique()})
+    valid, quarantined = validator.validate(df)
+
+    assert len(valid) == 79
+    assert len(quarantined) == 6
+    assert validator.violation_counts["negative_price"] == 1
+    assert validator.violation_counts["min_above_max"] == 1
+    assert validator.violation_counts["modal_out_of_range"] == 2
+    assert validator.violation_counts["bad_arrival_date"] == 1
+    assert validator.violation_counts["unknown_category"] == 1
+    assert validator.violation_counts["duplicate_row"] == 1
+    assert quarantined["Reasons"].iloc[-1] == "duplicate_row"
+    assert quarantined["Reason_Code"].iloc[-1] == 1 << 6
+
+
+def test_validator_quarantines_unparsable_price():
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    df["Min_Price"] = df["Min_Price"].astype(str)
+    df.loc[3, "Min_Price"] = "abc"
+
+    validator = DataValidator()
+    valid, quarantined = validator.validate(df)
+
+    assert list(quarantined.index) == [3]
+    assert quarantined["Reasons"].iloc[0] == "unparsable_price"
+    assert validator.violation_counts["unparsable_price"] == 1
+    assert pd.api.types.is_numeric_dtype(valid["Min_Price"])
+    assert len(valid) == len(df) - 1
+
+
+def test_category_codes_match_label_encoding(tmp_path, monkeypatch):
+    # processData saves the label encoders it is given, keep the tracked ones untouched.
+    monkeypatch.setitem(data_processing.processing_configs, "label_encoder_folder_path", str(tmp_path))
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    encoder = {col: LabelEncoder().fit(df[col]) for col in df.select_dtypes(include="object").columns}
+    scaler = MinMaxScaler().fit(df.select_dtypes(exclude="object"))
+
+    batch = df.copy()
+    batch.loc[2, "Market"] = None
+    batch.loc[5, "Commodity"] = "Unknown Commodity"
+    validator = DataValidator.fromEncoder(encoder)
+    valid, _ = validator.validate(batch)
+    assert len(validator.category_codes["Market"]) == len(valid) == len(df) - 1
+
+    expected = processData(valid, scaler=scaler, encoder=encoder)
+    reused = processData(valid, scaler=scaler, encoder=encoder, category_codes=validator.category_codes)
+    pd.testing.assert_frame_equal(reused, expected)
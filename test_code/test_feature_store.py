@@ -0,0 +1,56 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+from src.feature_store import PriceFeatureStore
+
+
+def makeBatch(keys: list, prices: list, start_day: int) -> pd.DataFrame:
+    batch = pd.DataFrame({col: keys for col in PriceFeatureStore.series_cols})
+    batch["Modal_Price"] = prices
+    batch["Arrival_Date"] = (np.datetime64("2024-01-01") + np.arange(start_day, start_day + len(keys))).astype(str)
+    return batch
+
+
+def test_feature_store_keeps_last_window_prices(tmp_path):
+    store = PriceFeatureStore(window=3, capacity=1)
+    store.append(makeBatch(["a", "b", "a"], [1.0, 10.0, 2.0], 0))
+    store.append(makeBatch(["a", "a", "c", "a"], [3.0, 4.0, 20.0, 5.0], 3))
+
+    ids = store.seriesIds(makeBatch(["a", "b", "unknown"], [0, 0, 0], 0))
+    assert ids[-1] == -1
+    prices, dates = store.getFeatures(ids)
+    np.testing.assert_array_equal(prices[0], [3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(prices[1], [np.nan, np.nan, 10.0])
+    assert np.isnan(prices[2]).all()
+    assert str(dates[0, -1]) == "2024-01-07"
+    assert np.isnat(dates[1, 0])
+
+    store.snapshot(str(tmp_path))
+    restored = PriceFeatureStore.restore(str(tmp_path))
+    restored.append(makeBatch(["a", "d"], [6.0, 30.0], 7))
+    restored_prices, _ = restored.getFeatures(ids)
+    np.testing.assert_array_equal(restored_prices[0], [4.0, 5.0, 6.0])
+    np.testing.assert_array_equal(restored_prices[1], prices[1])
+    assert restored.n_series == 4
+
+
+def test_feature_store_skips_seen_batches_and_warns_on_window(tmp_path, caplog):
+    store = PriceFeatureStore(window=3)
+    batch = makeBatch(["a", "a"], [1.0, 2.0], 0)
+    store.append(batch, batch_key="batch-0")
+    store.append(batch, batch_key="batch-0")
+    store.append(batch.iloc[:0], batch_key="batch-1")
+    assert store.length[0] == 2
+
+    store.snapshot(str(tmp_path))
+    restored = PriceFeatureStore.restoreOrCreate(str(tmp_path), window=5)
+    assert restored.window == 3
+    assert "window 3 instead of the requested 5" in caplog.text
+    restored.append(batch, batch_key="batch-0")
+    prices, _ = restored.getFeatures(np.array([0]))
+    np.testing.assert_array_equal(prices[0], [np.nan, 1.0, 2.0])
@@ -0,0 +1,53 @@
+import pandas as pd
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+from data_processing_pipeline import cachedProcessData
+from src import data_processing
+from src.processing_cache import ProcessingCache
+
+
+def test_cached_process_data(tmp_path, monkeypatch):
+    # processData saves the artifacts it fits, keep them away from the tracked ones in src/processing_metrics.
+    monkeypatch.setitem(data_processing.processing_configs, "scaler_file_path", str(tmp_path / "scaler.pkl"))
+    monkeypatch.setitem(data_processing.processing_configs, "label_encoder_folder_path", str(tmp_path))
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    cache = ProcessingCache(cache_folder=str(tmp_path / "cache"))
+
+    first, hit, key = cachedProcessData(df, cache)
+    assert not hit
+    second, hit, second_key = cachedProcessData(df, cache)
+    assert hit and second_key == key
+    pd.testing.assert_frame_equal(first, second)
+
+    _, hit, standard_key = cachedProcessData(df, cache, scale_method="standard")
+    assert not hit and standard_key != key
+    assert cache.report()["hits"] == 1
+    assert cache.hitRate() == 1 / 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    df = pd.DataFrame({"a": range(1000)})
+    cache = ProcessingCache(cache_folder=str(tmp_path))
+    for i in range(3):
+        cache.put(str(i), df + i, compute_seconds=1.0)
+        os.utime(os.path.join(tmp_path, f"{i}.pkl"), (i, i))
+
+    cache.max_size_bytes = 2 * os.path.getsize(os.path.join(tmp_path, "0.pkl"))
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == ["1.pkl", "2.pkl"]
+
+
+def test_upload_markers_survive_eviction(tmp_path):
+    cache = ProcessingCache(cache_folder=str(tmp_path), max_size_bytes=0)
+    cache.put("batch", pd.DataFrame({"a": range(10)}), compute_seconds=1.0)
+    assert not cache.isUploaded("batch", "processed.csv")
+
+    cache.markUploaded("batch", "processed.csv")
+    cache.evict()
+    assert cache.get("batch") is None
+    assert cache.isUploaded("batch", "processed.csv")
+    assert not cache.isUploaded("batch", "quarantined_rows.csv")
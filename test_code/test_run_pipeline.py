@@ -0,0 +1,118 @@
+import pandas as pd
+import numpy as np
+import pytest
+import os
+import sys
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.extend([PROJECT_ROOT])
+
+import data_processing_pipeline
+from src import data_processing
+from src.feature_store import PriceFeatureStore
+
+
+class InMemoryS3Handler:
+    """
+    Stands in for S3BucketHandler: streams the given batches and keeps appended frames per file key.
+    """
+
+    batches = []
+    files = {}
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+
+    def readS3DataStreaming(self, file_key: str, nrows: int, totalrows: int):
+        for batch in self.batches:
+            yield batch.copy()
+
+    def appendToS3StreamCSV(self, file_key, new_data_df):
+        self.files.setdefault(file_key, []).append(new_data_df)
+
+    def readS3Data(self, file_key: str, nrows: int) -> pd.DataFrame:
+        return pd.concat(self.files.get(file_key, [pd.DataFrame()]), ignore_index=True)
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    # Keep every artifact, cache entry and state file of the run inside tmp_path.
+    monkeypatch.setattr(data_processing_pipeline, "S3BucketHandler", InMemoryS3Handler)
+    monkeypatch.setattr(InMemoryS3Handler, "files", {})
+    monkeypatch.setitem(data_processing.processing_configs, "scaler_file_path", str(tmp_path / "scaler.pkl"))
+    monkeypatch.setitem(data_processing.processing_configs, "label_encoder_folder_path", str(tmp_path))
+    for name, path in (("processing_cache_folder_path", "cache"), ("anomaly_state_file_path", "anomaly_state.npz"), ("feature_store_folder_path", "feature_store")):
+        monkeypatch.setitem(data_processing_pipeline.processing_configs, name, str(tmp_path / path))
+
+    df = pd.read_csv(os.path.join(PROJECT_ROOT, "test_code/test_row_data.csv"))
+    scaler = MinMaxScaler().fit(df.select_dtypes(exclude="object"))
+    encoder = {col: LabelEncoder().fit(df[col]) for col in df.select_dtypes(include="object").columns}
+
+    def run(batches: list, scaler=scaler, encoder=encoder) -> dict:
+        monkeypatch.setattr(InMemoryS3Handler, "batches", batches)
+        data_processing_pipeline.runProcessingPipeline(scaler=scaler, encoder=encoder)
+        return InMemoryS3Handler.files
+
+    return df, run
+
+
+def test_pipeline_skips_fully_quarantined_batch(pipeline):
+    df, run = pipeline
+    configs = data_processing_pipeline.configs
+    bad = df.head(5).assign(Modal_Price=-1)
+
+    files = run([bad, df])
+    assert len(files[configs["quarantine_file_key"]][0]) == 5
+    assert [len(batch) for batch in files[configs["batch_processed_file_key"]]] == [len(df)]
+
+    files = run([bad, df])
+    assert len(files[configs["quarantine_file_key"]]) == 1
+    assert len(files[configs["batch_processed_file_key"]]) == 1
+
+
+def test_pipeline_uploads_again_after_refit(pipeline):
+    df, run = pipeline
+    configs = data_processing_pipeline.configs
+
+    run([df])
+    files = run([df])
+    assert len(files[configs["batch_processed_file_key"]]) == 1
+
+    refit_scaler = MinMaxScaler().fit(df.select_dtypes(exclude="object") * 2)
+    files = run([df], scaler=refit_scaler)
+    uploads = files[configs["batch_processed_file_key"]]
+    assert len(uploads) == 2
+    assert not uploads[0]["Modal_Price"].equals(uploads[1]["Modal_Price"])
+
+
+def test_pipeline_flags_prices_of_dates_the_encoders_have_not_seen(pipeline):
+    df, run = pipeline
+    configs = data_processing_pipeline.configs
+    rng = np.random.default_rng(0)
+    price_cols = ["Min_Price", "Max_Price", "Modal_Price"]
+
+    batches = []
+    for _ in range(6):
+        batch = df.copy()
+        batch[price_cols] = batch[price_cols].mul(rng.uniform(0.99, 1.01, len(batch)), axis=0)
+        batches.append(batch)
+    spike = df.head(5).assign(Arrival_Date="2030-01-01")
+    spike.loc[3, price_cols] *= 3
+    batches.append(spike)
+
+    files = run(batches)
+    assert len(files[configs["quarantine_file_key"]][-1]) == 5
+    anomalies = files[configs["anomaly_file_key"]]
+    assert len(anomalies) == 1 and list(anomalies[0].index) == [3]
+
+
+def test_pipeline_serves_prices_of_dates_the_encoders_have_not_seen(pipeline):
+    df, run = pipeline
+    recent = df.head(5).assign(Arrival_Date="2030-01-01", Min_Price=1, Max_Price=100, Modal_Price=50)
+    run([df, recent])
+
+    store = PriceFeatureStore.restore(data_processing_pipeline.processing_configs["feature_store_folder_path"])
+    prices, dates = store.getFeatures(store.seriesIds(recent))
+    assert (prices[:, -1] == 50).all()
+    assert (dates[:, -1] == np.datetime64("2030-01-01")).all()